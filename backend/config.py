@@ -5,8 +5,10 @@ Supports environment variables and .env file.
 """
 
 from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import Literal, Optional
 
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -34,6 +36,9 @@ class Settings(BaseSettings):
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8765
+    reload: bool = False  # Auto-reload on code changes (development only)
+    workers: int = 1  # Server processes (each local-mode worker loads its own model)
+    log_level: str = "info"  # debug also logs every subtitle sent
     
     # Transcription mode
     transcription_mode: TranscriptionMode = TranscriptionMode.AUTO
@@ -41,6 +46,8 @@ class Settings(BaseSettings):
     # Local Whisper settings
     whisper_model_size: str = "small"
     whisper_device: str = "auto"  # auto, cuda, cpu
+    whisper_compute_type: str = "auto"  # auto (best supported int8/fp16 on GPU, int8 on CPU), or any CTranslate2 type
+    whisper_beam_size: int = 1  # 1 = greedy (fastest), raise for accuracy
     
     # Groq API settings
     groq_api_key: Optional[str] = None
@@ -50,9 +57,18 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     openai_model: str = "whisper-1"
     
+    # Translation settings
+    translator_backend: Literal["google", "nllb_ct2"] = "google"
+    nllb_model_path: str = "nllb-200-distilled-600M-int8"  # CTranslate2-converted model directory
+    nllb_tokenizer: str = "facebook/nllb-200-distilled-600M"
+    
     # Performance settings
     max_audio_duration_seconds: int = 30
     enable_vad: bool = True  # Voice Activity Detection
+    transcribe_workers: Optional[int] = None  # Parallel local decodes (None = one at a time, all cores)
+    
+    # Resolved on first get_effective_mode() call
+    _effective_mode: Optional[TranscriptionMode] = PrivateAttr(default=None)
     
     def get_effective_mode(self) -> TranscriptionMode:
         """
@@ -62,7 +78,15 @@ class Settings(BaseSettings):
         1. Try Groq if API key is set
         2. Try OpenAI if API key is set
         3. Fall back to local
+        
+        The result is computed once and cached on the instance.
         """
+        if self._effective_mode is None:
+            self._effective_mode = self._resolve_mode()
+        return self._effective_mode
+    
+    def _resolve_mode(self) -> TranscriptionMode:
+        """Resolve AUTO mode to a concrete transcription mode."""
         if self.transcription_mode != TranscriptionMode.AUTO:
             return self.transcription_mode
         
@@ -75,5 +99,7 @@ class Settings(BaseSettings):
         return TranscriptionMode.LOCAL
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Get settings singleton instance (loaded on first use)."""
+    return Settings()
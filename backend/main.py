@@ -5,43 +5,62 @@ Provides WebSocket endpoint for real-time audio transcription
 with translation support.
 """
 
+import asyncio
 import base64
-import json
+import binascii
+import logging
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator
 
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import settings
-from services.transcriber_factory import TranscriberFactory
-from services.translator import get_translator
+from config import get_settings
+from services.transcriber import merge_segments
+from services.transcriber_factory import StreamingTranscriber, TranscriberFactory
+from services.translator import Translator, get_translator
 
-# Global transcriber instance
+logger = logging.getLogger("bypass")
+
+# Global transcriber and translator instances (set in lifespan)
 transcriber: Any = None
+translator: Translator | None = None
+
+# Detected language confidence needed to skip detection for the rest of a session
+LANGUAGE_LOCK_PROBABILITY = 0.8
+
+
+class _ClientLogAdapter(logging.LoggerAdapter):
+    """Prefix log messages with the WebSocket client id."""
+    
+    def process(self, msg: Any, kwargs: Any) -> tuple[Any, Any]:
+        # Only called for records that pass the level check
+        return f"[client {self.extra['client_id']}] {msg}", kwargs
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
     Lifespan context manager for FastAPI.
-    Initializes the transcriber on startup.
+    Initializes the transcriber and translator on startup.
     """
-    global transcriber
+    global transcriber, translator
     
-    mode = settings.get_effective_mode()
-    print(f"🚀 Starting Bypass Subtitles Backend (mode: {mode.value})...")
+    mode = get_settings().get_effective_mode()
+    logger.info("🚀 Starting Bypass Subtitles Backend (mode: %s)...", mode.value)
     
     # Initialize transcriber based on config
     transcriber = await TranscriberFactory.create()
+    translator = get_translator()
+    await translator.initialize()
     
-    print("✅ Backend ready!")
+    logger.info("✅ Backend ready!")
     yield
     
     # Cleanup
-    translator = get_translator()
     await translator.close()
-    print("👋 Shutting down...")
+    logger.info("👋 Shutting down...")
 
 
 app = FastAPI(
@@ -64,7 +83,7 @@ app.add_middleware(
 @app.get("/health")
 async def health_check() -> dict:
     """Health check endpoint."""
-    mode = settings.get_effective_mode()
+    mode = get_settings().get_effective_mode()
     return {
         "status": "healthy",
         "model_loaded": transcriber is not None and transcriber.is_ready,
@@ -75,6 +94,7 @@ async def health_check() -> dict:
 @app.get("/config")
 async def get_config() -> dict:
     """Get current configuration."""
+    settings = get_settings()
     mode = settings.get_effective_mode()
     return {
         "mode": mode.value,
@@ -84,24 +104,133 @@ async def get_config() -> dict:
     }
 
 
+async def _send_json(websocket: WebSocket, payload: dict[str, Any]) -> None:
+    """Send a JSON text frame, serialized with orjson."""
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+async def _add_translation(
+    translator: Translator,
+    result: dict[str, Any],
+    source_lang: str,
+    target_lang: str,
+) -> None:
+    """Fill 'translated' and 'original' on a transcription result in place."""
+    original_text = result.get("text", "")
+    
+    # Translate if target language is specified
+    if target_lang and original_text:
+        detected_lang = result.get("language") or source_lang
+        
+        # Don't translate if source and target are the same
+        if detected_lang != target_lang:
+            segments = result.get("segments") or []
+            if len(segments) > 1:
+                # Translate all segments in one batched request
+                translated_segments = await translator.translate_batch(
+                    [seg["text"] for seg in segments],
+                    target_lang=target_lang,
+                    source_lang=detected_lang,
+                )
+                for seg, translated in zip(segments, translated_segments):
+                    seg["translated"] = translated
+                result["translated"] = " ".join(t for t in translated_segments if t)
+            else:
+                translation = await translator.translate(
+                    text=original_text,
+                    target_lang=target_lang,
+                    source_lang=detected_lang,
+                )
+                result["translated"] = translation.get("translated", "")
+            result["original"] = original_text
+        else:
+            result["translated"] = original_text
+            result["original"] = original_text
+    else:
+        result["translated"] = ""
+        result["original"] = original_text
+
+
+def _needs_translation(
+    result: dict[str, Any],
+    source_lang: str,
+    target_lang: str,
+) -> bool:
+    """Whether _add_translation() would call the translator for this result."""
+    if not (target_lang and result.get("text")):
+        return False
+    return (result.get("language") or source_lang) != target_lang
+
+
+async def _send_result(
+    websocket: WebSocket,
+    translator: Translator,
+    result: dict[str, Any],
+    source_lang: str,
+    target_lang: str,
+    show_original: bool,
+) -> None:
+    """Translate a transcription result and send it to the client."""
+    if result.get("error"):
+        await _send_json(websocket, result)
+        return
+    
+    await _add_translation(translator, result, source_lang, target_lang)
+    result["showOriginal"] = show_original
+    
+    # Send result back
+    await _send_json(websocket, result)
+    
+    original_text = result["original"]
+    if original_text and logger.isEnabledFor(logging.DEBUG):
+        log_text = result.get("translated") or original_text
+        logger.debug("📤 [%s] %s...", result.get("provider", "local"), log_text[:80])
+
+
 @app.websocket("/ws/transcribe")
 async def websocket_transcribe(websocket: WebSocket) -> None:
     """
     WebSocket endpoint for real-time audio transcription with translation.
     
     Protocol:
-        1. Client sends JSON: {"audio": "<base64>", "sourceLang": "auto", "targetLang": "vi"}
-        2. Server responds: {"text": "...", "translated": "...", "original": "...", ...}
+        1. Client sends a JSON settings frame (on connect and whenever settings change):
+           {"sourceLang": "auto", "targetLang": "vi", "showOriginal": true}
+        2. Client sends raw PCM audio (16-bit, 16kHz, mono) as binary frames
+        3. Server responds: {"text": "...", "translated": "...", "original": "...",
+           "chunk": 1, "final": true, ...}
+           Local mode may first send each segment as soon as it is decoded
+           ("final": false); the closing "final": true frame carries the
+           whole chunk and replaces them
     
     OR (legacy):
-        1. Client sends binary audio data
-        2. Server responds with transcription only
+        1. Client sends JSON: {"audio": "<base64>", "sourceLang": "auto", "targetLang": "vi"}
+        2. Server responds as above
     """
     await websocket.accept()
-    client_id = id(websocket)
-    print(f"🔌 Client {client_id} connected")
+    log = _ClientLogAdapter(logger, {"client_id": id(websocket)})
+    log.info("🔌 Connected")
     
-    translator = get_translator()
+    # Open provider connections while the first audio chunk is recorded
+    # (referenced until the handler returns so the task is not collected)
+    warm_up = (
+        asyncio.create_task(transcriber.warm_up())
+        if transcriber is not None and transcriber.is_ready
+        else None
+    )
+    
+    # Local transcriber streams segments as the decoder produces them
+    streaming = isinstance(transcriber, StreamingTranscriber)
+    
+    # Per-connection settings, updated by JSON frames
+    source_lang: str = "auto"
+    target_lang: str = ""
+    show_original: bool = True
+    
+    # Language detected with high confidence while sourceLang is "auto"
+    session_lang: str | None = None
+    
+    # Sequence id of the audio chunk being answered, echoed as "chunk"
+    chunk_id = 0
     
     try:
         while True:
@@ -109,23 +238,25 @@ async def websocket_transcribe(websocket: WebSocket) -> None:
             message = await websocket.receive()
             
             audio_data: bytes
-            source_lang: str = "auto"
-            target_lang: str = ""
-            show_original: bool = True
             
             if "bytes" in message:
-                # Legacy binary protocol
+                # Binary audio frame, uses the session settings
                 audio_data = message["bytes"]
             elif "text" in message:
-                # JSON protocol with settings
+                # JSON frame with settings (and legacy base64 audio)
                 try:
-                    data = json.loads(message["text"])
-                    audio_data = base64.b64decode(data.get("audio", ""))
-                    source_lang = data.get("sourceLang", "auto")
-                    target_lang = data.get("targetLang", "")
-                    show_original = data.get("showOriginal", True)
-                except (json.JSONDecodeError, KeyError) as e:
-                    await websocket.send_json({"error": f"Invalid message format: {e}"})
+                    data = orjson.loads(message["text"])
+                    # Normalize once so "" / null mean auto-detect everywhere below
+                    new_source_lang = data.get("sourceLang", source_lang) or "auto"
+                    if new_source_lang != source_lang:
+                        session_lang = None  # Re-detect after a source change
+                    source_lang = new_source_lang
+                    target_lang = data.get("targetLang", target_lang)
+                    show_original = data.get("showOriginal", show_original)
+                    audio = data.get("audio")
+                    audio_data = base64.b64decode(audio) if audio else b""
+                except (orjson.JSONDecodeError, binascii.Error) as e:
+                    await _send_json(websocket, {"error": f"Invalid message format: {e}"})
                     continue
             else:
                 continue
@@ -134,54 +265,58 @@ async def websocket_transcribe(websocket: WebSocket) -> None:
                 continue
             
             if transcriber is None or not transcriber.is_ready:
-                await websocket.send_json({
+                await _send_json(websocket, {
                     "error": "Transcriber not ready",
                     "text": "",
                 })
                 continue
             
-            # Transcribe audio
-            result = await transcriber.transcribe(audio_data)
+            chunk_id += 1
             
-            if result.get("error"):
-                await websocket.send_json(result)
-                continue
-            
-            original_text = result.get("text", "")
-            
-            # Translate if target language is specified
-            if target_lang and original_text:
-                detected_lang = result.get("language", source_lang)
-                
-                # Don't translate if source and target are the same
-                if detected_lang != target_lang:
-                    translation = await translator.translate(
-                        text=original_text,
-                        target_lang=target_lang,
-                        source_lang=detected_lang if detected_lang != "auto" else "auto",
+            if streaming:
+                # Skip per-chunk language detection once the language is known
+                language = session_lang if source_lang == "auto" else source_lang
+                partials: list[dict[str, Any]] = []
+                send_partials = True
+                async for partial in transcriber.transcribe_stream(audio_data, language):
+                    if partial.get("error"):
+                        await _send_json(websocket, partial)
+                        continue
+                    if (
+                        source_lang == "auto"
+                        and session_lang is None
+                        and partial.get("language_probability", 0) > LANGUAGE_LOCK_PROBABILITY
+                    ):
+                        session_lang = partial["language"]
+                    partials.append(partial)
+                    
+                    # From the first segment needing translation on, the chunk
+                    # waits for the final frame, which translates it in one
+                    # batched request
+                    send_partials = send_partials and not _needs_translation(
+                        partial, source_lang, target_lang,
                     )
-                    result["translated"] = translation.get("translated", "")
-                    result["original"] = original_text
-                else:
-                    result["translated"] = original_text
-                    result["original"] = original_text
+                    if send_partials:
+                        partial.update(chunk=chunk_id, final=False)
+                        await _send_result(
+                            websocket, translator, partial,
+                            source_lang, target_lang, show_original,
+                        )
+                result = merge_segments(partials)
             else:
-                result["translated"] = ""
-                result["original"] = original_text
-            
-            result["showOriginal"] = show_original
-            
-            # Send result back
-            await websocket.send_json(result)
+                # Transcribe audio
+                result = await transcriber.transcribe(audio_data)
             
-            if original_text:
-                log_text = result.get("translated") or original_text
-                print(f"📤 [{result.get('provider', 'local')}] {log_text[:80]}...")
+            result.update(chunk=chunk_id, final=True)
+            await _send_result(
+                websocket, translator, result,
+                source_lang, target_lang, show_original,
+            )
             
     except WebSocketDisconnect:
-        print(f"🔌 Client {client_id} disconnected")
+        log.info("🔌 Disconnected")
     except Exception as e:
-        print(f"❌ Error with client {client_id}: {e}")
+        log.error("❌ Error: %s", e)
         try:
             await websocket.close(code=1011, reason=str(e))
         except Exception:
@@ -189,12 +324,32 @@ async def websocket_transcribe(websocket: WebSocket) -> None:
 
 
 if __name__ == "__main__":
+    import copy
+    import sys
+    
     import uvicorn
+    from uvicorn.config import LOGGING_CONFIG
+    
+    settings = get_settings()
+    
+    # Route app logs through uvicorn's handlers so one level filters both
+    log_config = copy.deepcopy(LOGGING_CONFIG)
+    log_config["loggers"]["bypass"] = {
+        "handlers": ["default"],
+        "level": settings.log_level.upper(),
+        "propagate": False,
+    }
     
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=True,
-        log_level="info",
+        # libuv event loop and C HTTP parser (uvloop has no Windows build)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        reload=settings.reload,
+        workers=1 if settings.reload else settings.workers,
+        log_config=log_config,
+        log_level=settings.log_level,
     )
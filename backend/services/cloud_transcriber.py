@@ -4,125 +4,223 @@ Cloud Transcription Service - Groq & OpenAI Whisper APIs
 Handles speech-to-text via cloud APIs for users without GPU.
 """
 
-import tempfile
+import asyncio
+import logging
+import struct
 from abc import ABC, abstractmethod
 from typing import Any
 
+logger = logging.getLogger("bypass.cloud_transcriber")
 
-class CloudTranscriberBase(ABC):
-    """Base class for cloud transcription services."""
-    
-    @abstractmethod
-    async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
-        """Transcribe audio data."""
-        pass
+# WAV header for PCM 16-bit, 16kHz, mono. Only the two size fields
+# (RIFF chunk size at offset 4, data size at offset 40) vary per call.
+_WAV_HEADER_TEMPLATE = struct.pack(
+    '<4sI4s4sIHHIIHH4sI',
+    b'RIFF',
+    0,
+    b'WAVE',
+    b'fmt ',
+    16,
+    1,
+    1,
+    16000,
+    32000,
+    2,
+    16,
+    b'data',
+    0,
+)
+_PACK_U32 = struct.Struct('<I').pack_into
+
+# Whisper language names (as returned by Groq/OpenAI verbose_json) -> ISO codes
+WHISPER_LANGUAGE_CODES = {
+    "english": "en", "chinese": "zh", "german": "de", "spanish": "es", "russian": "ru",
+    "korean": "ko", "french": "fr", "japanese": "ja", "portuguese": "pt",
+    "turkish": "tr", "polish": "pl", "catalan": "ca", "dutch": "nl", "arabic": "ar",
+    "swedish": "sv", "italian": "it", "indonesian": "id", "hindi": "hi",
+    "finnish": "fi", "vietnamese": "vi", "hebrew": "he", "ukrainian": "uk",
+    "greek": "el", "malay": "ms", "czech": "cs", "romanian": "ro", "danish": "da",
+    "hungarian": "hu", "tamil": "ta", "norwegian": "no", "thai": "th", "urdu": "ur",
+    "croatian": "hr", "bulgarian": "bg", "lithuanian": "lt", "latin": "la",
+    "maori": "mi", "malayalam": "ml", "welsh": "cy", "slovak": "sk", "telugu": "te",
+    "persian": "fa", "latvian": "lv", "bengali": "bn", "serbian": "sr",
+    "azerbaijani": "az", "slovenian": "sl", "kannada": "kn", "estonian": "et",
+    "macedonian": "mk", "breton": "br", "basque": "eu", "icelandic": "is",
+    "armenian": "hy", "nepali": "ne", "mongolian": "mn", "bosnian": "bs",
+    "kazakh": "kk", "albanian": "sq", "swahili": "sw", "galician": "gl",
+    "marathi": "mr", "punjabi": "pa", "sinhala": "si", "khmer": "km", "shona": "sn",
+    "yoruba": "yo", "somali": "so", "afrikaans": "af", "occitan": "oc",
+    "georgian": "ka", "belarusian": "be", "tajik": "tg", "sindhi": "sd",
+    "gujarati": "gu", "amharic": "am", "yiddish": "yi", "lao": "lo", "uzbek": "uz",
+    "faroese": "fo", "haitian creole": "ht", "pashto": "ps", "turkmen": "tk",
+    "nynorsk": "nn", "maltese": "mt", "sanskrit": "sa", "luxembourgish": "lb",
+    "myanmar": "my", "tibetan": "bo", "tagalog": "tl", "malagasy": "mg",
+    "assamese": "as", "tatar": "tt", "hawaiian": "haw", "lingala": "ln", "hausa": "ha",
+    "bashkir": "ba", "javanese": "jw", "sundanese": "su", "cantonese": "yue",
+}
+
+# Upper bound on the connection warm-up request when a client connects
+WARM_UP_TIMEOUT_SECONDS = 3.0
+
+# Idle time before a pooled API connection is closed. The SDK default (5 s)
+# drops the warmed connection before the first utterance arrives.
+KEEPALIVE_EXPIRY_SECONDS = 300.0
+
+
+def _pcm_to_wav(pcm_data: bytes) -> bytes:
+    """Convert PCM 16-bit, 16kHz, mono data to WAV format."""
+    data_size = len(pcm_data)
+    header = bytearray(_WAV_HEADER_TEMPLATE)
+    _PACK_U32(header, 4, 36 + data_size)
+    _PACK_U32(header, 40, data_size)
+    return bytes(header) + pcm_data
+
+
+def _connection_limits() -> Any:
+    """SDK default pool limits with a keep-alive that outlives the idle gaps."""
+    import httpx
     
-    @abstractmethod
-    async def is_available(self) -> bool:
-        """Check if the service is available."""
-        pass
+    return httpx.Limits(
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
 
 
-class GroqTranscriber(CloudTranscriberBase):
+def _language_code(language: str | None) -> str:
+    """Normalize a cloud API language name ("english") to its code ("en")."""
+    if not language:
+        return "unknown"
+    language = language.lower()
+    return WHISPER_LANGUAGE_CODES.get(language, language)
+
+
+def _segment_field(seg: Any, name: str, default: Any) -> Any:
+    """Read a segment field from either a dict (Groq) or an object (OpenAI)."""
+    if isinstance(seg, dict):
+        return seg.get(name, default)
+    return getattr(seg, name, default)
+
+
+class CloudTranscriberBase(ABC):
     """
-    Transcription using Groq Whisper API.
+    Base class for cloud transcription services.
     
-    Groq offers very fast Whisper inference with a generous free tier.
+    Providers speaking the OpenAI-compatible transcription API only need
+    to set their names and implement _make_client(). Instances satisfy
+    the Transcriber protocol directly.
     """
     
-    def __init__(self, api_key: str, model: str = "whisper-large-v3"):
+    provider: str = ""      # Result 'provider' value, e.g. "groq"
+    display_name: str = ""  # Human-readable name for logs
+    
+    def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
         self._client = None
-        
+        self.is_ready = False
+    
+    @abstractmethod
+    def _make_client(self) -> Any:
+        """Create the provider's async SDK client."""
+        pass
+    
     async def _get_client(self):
-        """Get or create Groq client."""
+        """Get or create the SDK client."""
         if self._client is None:
-            from groq import AsyncGroq
-            self._client = AsyncGroq(api_key=self.api_key)
+            self._client = self._make_client()
         return self._client
     
+    async def initialize(self) -> None:
+        """Initialize the client and mark the transcriber ready if usable."""
+        self.is_ready = await self.is_available()
+        if self.is_ready:
+            logger.info("✅ %s transcriber ready", self.display_name)
+        else:
+            logger.error("❌ %s transcriber not available", self.display_name)
+    
     async def is_available(self) -> bool:
-        """Check if Groq API is available."""
+        """Check if the service is available."""
         try:
-            await self._get_client()
-            return True
+            client = await self._get_client()
         except Exception as e:
-            print(f"⚠️ Groq not available: {e}")
+            logger.warning("⚠️ %s not available: %s", self.display_name, e)
             return False
+        return True
+    
+    async def warm_up(self) -> None:
+        """
+        Open the API connection ahead of the first utterance.
+        
+        Called when a client connects, so DNS + TLS setup overlaps the
+        recording of the first audio chunk. Failures are only logged;
+        transcription will connect on demand.
+        """
+        try:
+            client = await self._get_client()
+            await asyncio.wait_for(client.models.list(), timeout=WARM_UP_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning("⚠️ %s warm-up failed: %r", self.display_name, e)
     
     async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
         """
-        Transcribe audio using Groq Whisper API.
+        Transcribe audio using the provider's Whisper API.
         """
         try:
             client = await self._get_client()
             
             # Convert PCM to WAV format for API
-            wav_data = self._pcm_to_wav(audio_data)
+            wav_data = _pcm_to_wav(audio_data)
             
-            # Create temp file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-                temp_file.write(wav_data)
-                temp_file.flush()
-                temp_file.seek(0)
-                
-                with open(temp_file.name, "rb") as audio_file:
-                    transcription = await client.audio.transcriptions.create(
-                        file=audio_file,
-                        model=self.model,
-                        response_format="verbose_json",
-                    )
+            # Upload from memory as (filename, content, content_type)
+            transcription = await client.audio.transcriptions.create(
+                file=("audio.wav", wav_data, "audio/wav"),
+                model=self.model,
+                response_format="verbose_json",
+            )
             
             # Parse response
             segments = []
             if hasattr(transcription, 'segments') and transcription.segments:
                 for seg in transcription.segments:
                     segments.append({
-                        "start": seg.get("start", 0),
-                        "end": seg.get("end", 0),
-                        "text": seg.get("text", "").strip(),
+                        "start": _segment_field(seg, "start", 0),
+                        "end": _segment_field(seg, "end", 0),
+                        "text": (_segment_field(seg, "text", "") or "").strip(),
                     })
             
             return {
                 "text": transcription.text.strip() if transcription.text else "",
                 "segments": segments,
-                "language": getattr(transcription, 'language', 'unknown'),
-                "provider": "groq",
+                "language": _language_code(getattr(transcription, 'language', None)),
+                "provider": self.provider,
             }
             
         except Exception as e:
-            print(f"❌ Groq transcription error: {e}")
-            return {"error": str(e), "text": "", "provider": "groq"}
+            logger.error("❌ %s transcription error: %s", self.display_name, e)
+            return {"error": str(e), "text": "", "provider": self.provider}
+
+
+class GroqTranscriber(CloudTranscriberBase):
+    """
+    Transcription using Groq Whisper API.
     
-    def _pcm_to_wav(self, pcm_data: bytes, sample_rate: int = 16000) -> bytes:
-        """Convert PCM 16-bit data to WAV format."""
-        import struct
-        
-        num_channels = 1
-        bits_per_sample = 16
-        byte_rate = sample_rate * num_channels * bits_per_sample // 8
-        block_align = num_channels * bits_per_sample // 8
-        data_size = len(pcm_data)
-        
-        header = struct.pack(
-            '<4sI4s4sIHHIIHH4sI',
-            b'RIFF',
-            36 + data_size,
-            b'WAVE',
-            b'fmt ',
-            16,
-            1,
-            num_channels,
-            sample_rate,
-            byte_rate,
-            block_align,
-            bits_per_sample,
-            b'data',
-            data_size,
+    Groq offers very fast Whisper inference with a generous free tier.
+    """
+    
+    provider = "groq"
+    display_name = "Groq"
+    
+    def __init__(self, api_key: str, model: str = "whisper-large-v3"):
+        super().__init__(api_key, model)
+    
+    def _make_client(self) -> Any:
+        """Create Groq client."""
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+        return AsyncGroq(
+            api_key=self.api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_connection_limits()),
         )
-        
-        return header + pcm_data
 
 
 class OpenAITranscriber(CloudTranscriberBase):
@@ -130,95 +228,16 @@ class OpenAITranscriber(CloudTranscriberBase):
     Transcription using OpenAI Whisper API.
     """
     
-    def __init__(self, api_key: str, model: str = "whisper-1"):
-        self.api_key = api_key
-        self.model = model
-        self._client = None
-        
-    async def _get_client(self):
-        """Get or create OpenAI client."""
-        if self._client is None:
-            from openai import AsyncOpenAI
-            self._client = AsyncOpenAI(api_key=self.api_key)
-        return self._client
+    provider = "openai"
+    display_name = "OpenAI"
     
-    async def is_available(self) -> bool:
-        """Check if OpenAI API is available."""
-        try:
-            await self._get_client()
-            return True
-        except Exception as e:
-            print(f"⚠️ OpenAI not available: {e}")
-            return False
-    
-    async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
-        """
-        Transcribe audio using OpenAI Whisper API.
-        """
-        try:
-            client = await self._get_client()
-            
-            # Convert PCM to WAV format
-            wav_data = self._pcm_to_wav(audio_data)
-            
-            # Create temp file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-                temp_file.write(wav_data)
-                temp_file.flush()
-                
-                with open(temp_file.name, "rb") as audio_file:
-                    transcription = await client.audio.transcriptions.create(
-                        file=audio_file,
-                        model=self.model,
-                        response_format="verbose_json",
-                    )
-            
-            # Parse response
-            segments = []
-            if hasattr(transcription, 'segments') and transcription.segments:
-                for seg in transcription.segments:
-                    segments.append({
-                        "start": seg.start,
-                        "end": seg.end,
-                        "text": seg.text.strip(),
-                    })
-            
-            return {
-                "text": transcription.text.strip() if transcription.text else "",
-                "segments": segments,
-                "language": getattr(transcription, 'language', 'unknown'),
-                "provider": "openai",
-            }
-            
-        except Exception as e:
-            print(f"❌ OpenAI transcription error: {e}")
-            return {"error": str(e), "text": "", "provider": "openai"}
+    def __init__(self, api_key: str, model: str = "whisper-1"):
+        super().__init__(api_key, model)
     
-    def _pcm_to_wav(self, pcm_data: bytes, sample_rate: int = 16000) -> bytes:
-        """Convert PCM 16-bit data to WAV format."""
-        import struct
-        
-        num_channels = 1
-        bits_per_sample = 16
-        byte_rate = sample_rate * num_channels * bits_per_sample // 8
-        block_align = num_channels * bits_per_sample // 8
-        data_size = len(pcm_data)
-        
-        header = struct.pack(
-            '<4sI4s4sIHHIIHH4sI',
-            b'RIFF',
-            36 + data_size,
-            b'WAVE',
-            b'fmt ',
-            16,
-            1,
-            num_channels,
-            sample_rate,
-            byte_rate,
-            block_align,
-            bits_per_sample,
-            b'data',
-            data_size,
+    def _make_client(self) -> Any:
+        """Create OpenAI client."""
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_connection_limits()),
         )
-        
-        return header + pcm_data
@@ -5,13 +5,54 @@ Handles speech-to-text transcription with GPU/CPU support.
 """
 
 import asyncio
+import logging
+import os
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 
-import numpy as np
+logger = logging.getLogger("bypass.transcriber")
 
-# Thread pool for CPU-bound transcription
-_executor = ThreadPoolExecutor(max_workers=2)
+# Thread pool for CPU-bound transcription (created on first initialize)
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get or create the shared transcription thread pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="transcriber",
+        )
+    return _executor
+
+
+# Marks the end of a segment stream
+_STREAM_END = object()
+
+
+def merge_segments(segments: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Combine per-segment results into one whole-chunk result.
+    
+    Args:
+        segments: Segment dictionaries as yielded by transcribe_stream()
+        
+    Returns:
+        Transcription result dictionary
+    """
+    last = segments[-1] if segments else {}
+    return {
+        "text": " ".join(seg["text"] for seg in segments),
+        "segments": [
+            {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            for seg in segments
+        ],
+        "language": last.get("language"),
+        "language_probability": last.get("language_probability"),
+        "provider": "local",
+    }
 
 
 class TranscriberService:
@@ -21,19 +62,40 @@ class TranscriberService:
     Supports both GPU (CUDA) and CPU with automatic fallback.
     """
     
-    def __init__(self, model_size: str = "small", device: str = "auto") -> None:
+    def __init__(
+        self,
+        model_size: str = "small",
+        device: str = "auto",
+        compute_type: str = "auto",
+        beam_size: int = 1,
+        vad_filter: bool = True,
+        workers: int | None = None,
+    ) -> None:
         """
         Initialize the transcriber.
         
         Args:
             model_size: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
             device: Device to use ('auto', 'cuda', 'cpu')
+            compute_type: CTranslate2 compute type, or 'auto' for
+                int8_float16 on GPU (float16 where int8 is unsupported)
+                and int8 on CPU
+            beam_size: Decoding beam size (1 = greedy)
+            vad_filter: Skip non-speech audio with Silero VAD
+            workers: Number of transcriptions decoded in parallel. None runs
+                one decode at a time using all CPU cores; a value > 1 loads
+                that many model replicas and splits the cores between them
         """
         self.model_size = model_size
         self.model = None
         self.is_ready = False
         self.device = device
         self.configured_device = device  # Store original config
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
         
     async def initialize(self) -> None:
         """
@@ -41,61 +103,99 @@ class TranscriberService:
         
         Attempts GPU first (if auto), falls back to CPU if not available.
         """
-        print(f"📦 Loading Whisper model: {self.model_size} (device: {self.configured_device})")
+        logger.info(
+            "📦 Loading Whisper model: %s (device: %s)",
+            self.model_size,
+            self.configured_device,
+        )
+        
+        self._executor = _get_executor(max(2, self.workers or 0))
         
         # Run model loading in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(_executor, self._load_model)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._load_model)
         
         self.is_ready = True
-        print(f"✅ Model loaded successfully on {self.device.upper()}")
+        logger.info("✅ Model loaded successfully on %s", self.device.upper())
+    
+    async def warm_up(self) -> None:
+        """Nothing to warm up; the model is loaded at startup."""
     
     def _load_model(self) -> None:
         """Load the Whisper model (blocking, run in thread pool)."""
         try:
-            from faster_whisper import WhisperModel
+            import faster_whisper  # noqa: F401  (fail early if missing)
             
             # If explicitly set to CPU, use CPU directly
             if self.configured_device == "cpu":
-                print("🖥️ Using CPU for transcription (configured)")
-                self.model = WhisperModel(
-                    self.model_size,
-                    device="cpu",
-                    compute_type="int8",
-                )
+                logger.info("🖥️ Using CPU for transcription (configured)")
+                self.model = self._create_cpu_model()
                 self.device = "cpu"
                 return
             
             # Try GPU first if auto or cuda
             if self.configured_device in ("auto", "cuda"):
                 try:
-                    self.model = WhisperModel(
-                        self.model_size,
-                        device="cuda",
-                        compute_type="float16",
-                    )
+                    self.model = self._create_gpu_model()
                     self.device = "cuda"
-                    print("🎮 Using GPU (CUDA) for transcription")
+                    logger.info("🎮 Using GPU (CUDA) for transcription")
                     return
                 except Exception as gpu_error:
-                    print(f"⚠️ GPU not available: {gpu_error}")
+                    logger.warning("⚠️ GPU not available: %s", gpu_error)
                     if self.configured_device == "cuda":
                         raise  # Don't fallback if explicitly set to cuda
-                    print("🖥️ Falling back to CPU...")
+                    logger.info("🖥️ Falling back to CPU...")
             
             # Fallback to CPU
-            self.model = WhisperModel(
-                self.model_size,
-                device="cpu",
-                compute_type="int8",
-            )
+            self.model = self._create_cpu_model()
             self.device = "cpu"
-            print("🖥️ Using CPU for transcription")
+            logger.info("🖥️ Using CPU for transcription")
                 
         except ImportError as e:
-            print(f"❌ Failed to import faster-whisper: {e}")
+            logger.error("❌ Failed to import faster-whisper: %s", e)
             raise
     
+    def _create_gpu_model(self) -> Any:
+        """Create a CUDA model with the best compute type the GPU supports."""
+        from faster_whisper import WhisperModel
+        
+        compute_type = self.compute_type
+        if compute_type == "auto":
+            import ctranslate2
+            
+            # int8 needs compute capability >= 6.1; older cards only do float16
+            supported = ctranslate2.get_supported_compute_types("cuda")
+            compute_type = next(
+                (ct for ct in ("int8_float16", "float16") if ct in supported),
+                "float32",
+            )
+        
+        return WhisperModel(
+            self.model_size,
+            device="cuda",
+            compute_type=compute_type,
+            **self._worker_kwargs(),
+        )
+    
+    def _create_cpu_model(self) -> Any:
+        """Create a CPU model using all cores, split between parallel workers."""
+        from faster_whisper import WhisperModel
+        
+        cpu_threads = max(1, (os.cpu_count() or 1) // (self.workers or 1))
+        return WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type="int8" if self.compute_type == "auto" else self.compute_type,
+            cpu_threads=cpu_threads,
+            **self._worker_kwargs(),
+        )
+    
+    def _worker_kwargs(self) -> dict[str, Any]:
+        """Extra model replicas, only when parallel decoding is requested."""
+        if self.workers and self.workers > 1:
+            return {"num_workers": self.workers}
+        return {}
+    
     async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
         """
         Transcribe audio data to text.
@@ -111,18 +211,62 @@ class TranscriberService:
         
         try:
             # Run transcription in thread pool
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             result = await loop.run_in_executor(
-                _executor,
+                self._executor,
                 self._transcribe_sync,
                 audio_data,
             )
             return result
             
         except Exception as e:
-            print(f"❌ Transcription error: {e}")
+            logger.error("❌ Transcription error: %s", e)
             return {"error": str(e), "text": ""}
     
+    async def transcribe_stream(
+        self,
+        audio_data: bytes,
+        language: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Transcribe audio data, yielding each segment as soon as it is decoded.
+        
+        Args:
+            audio_data: Raw audio bytes (PCM 16-bit, 16kHz, mono)
+            language: Language code, or None to auto-detect
+            
+        Yields:
+            Dictionary per segment with 'text', 'start', 'end' and 'language'
+        """
+        if not self.is_ready or self.model is None:
+            yield {"error": "Model not ready", "text": ""}
+            return
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def produce() -> None:
+            try:
+                for segment in self._transcribe_iter(audio_data, language):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, segment)
+            except Exception as e:
+                logger.error("❌ Transcription error: %s", e)
+                loop.call_soon_threadsafe(queue.put_nowait, {"error": str(e), "text": ""})
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+        
+        loop.run_in_executor(self._executor, produce)
+        
+        try:
+            while (item := await queue.get()) is not _STREAM_END:
+                yield item
+        finally:
+            # Stop decoding if the consumer went away early
+            stop.set()
+    
     def _transcribe_sync(self, audio_data: bytes) -> dict[str, Any]:
         """
         Synchronous transcription (run in thread pool).
@@ -133,33 +277,54 @@ class TranscriberService:
         Returns:
             Transcription result dictionary
         """
-        # Convert bytes to numpy array (assuming PCM 16-bit, 16kHz, mono)
-        audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        return merge_segments(list(self._transcribe_iter(audio_data)))
+    
+    def _transcribe_iter(
+        self,
+        audio_data: bytes,
+        language: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Synchronous segment generator (run in thread pool).
+        
+        faster-whisper decodes lazily, so each segment is yielded as soon
+        as the decoder reaches its boundary.
+        
+        Args:
+            audio_data: Raw audio bytes
+            language: Language code, or None to auto-detect
+            
+        Yields:
+            Result dictionary per non-empty segment
+        """
+        import numpy as np
+        
+        # Convert bytes to numpy array (assuming PCM 16-bit, 16kHz, mono).
+        # Cast and scale in a single pass into one preallocated buffer.
+        pcm = np.frombuffer(audio_data, dtype=np.int16)
+        audio_array = np.empty(pcm.shape[0], dtype=np.float32)
+        np.multiply(pcm, np.float32(1.0 / 32768.0), out=audio_array, casting="unsafe")
         
         # Transcribe
         segments, info = self.model.transcribe(
             audio_array,
-            beam_size=5,
-            language=None,  # Auto-detect language
-            vad_filter=True,  # Voice activity detection
+            language=language,  # None = auto-detect (extra pass per call)
+            beam_size=self.beam_size,
+            best_of=1,
+            condition_on_previous_text=False,  # Chunks are independent
+            vad_filter=self.vad_filter,  # Voice activity detection
+            vad_parameters={"min_silence_duration_ms": 300},
         )
         
-        # Collect results
-        segments_list = []
-        full_text = []
-        
         for segment in segments:
-            segments_list.append({
+            text = segment.text.strip()
+            if not text:
+                continue
+            yield {
+                "text": text,
                 "start": segment.start,
                 "end": segment.end,
-                "text": segment.text.strip(),
-            })
-            full_text.append(segment.text.strip())
-        
-        return {
-            "text": " ".join(full_text),
-            "segments": segments_list,
-            "language": info.language,
-            "language_probability": info.language_probability,
-            "provider": "local",
-        }
+                "language": info.language,
+                "language_probability": info.language_probability,
+                "provider": "local",
+            }
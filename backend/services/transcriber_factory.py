@@ -7,9 +7,25 @@ Supports:
 - OpenAI API
 """
 
-from typing import Any, Protocol
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Protocol, runtime_checkable
 
-from config import TranscriptionMode, settings
+from config import TranscriptionMode, get_settings
+from services.cloud_transcriber import (
+    CloudTranscriberBase,
+    GroqTranscriber,
+    OpenAITranscriber,
+)
+
+logger = logging.getLogger("bypass.transcriber_factory")
+
+# Cloud providers by mode. API key and model are read from the
+# '<mode>_api_key' and '<mode>_model' settings.
+CLOUD_PROVIDERS: dict[TranscriptionMode, type[CloudTranscriberBase]] = {
+    TranscriptionMode.GROQ: GroqTranscriber,
+    TranscriptionMode.OPENAI: OpenAITranscriber,
+}
 
 
 class Transcriber(Protocol):
@@ -21,16 +37,34 @@ class Transcriber(Protocol):
         """Initialize the transcriber."""
         ...
     
+    async def warm_up(self) -> None:
+        """Prepare for a newly connected client (e.g. open API connections)."""
+        ...
+    
     async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
         """Transcribe audio data."""
         ...
 
 
+@runtime_checkable
+class StreamingTranscriber(Transcriber, Protocol):
+    """Transcriber that can yield segments as soon as they are decoded."""
+    
+    def transcribe_stream(
+        self,
+        audio_data: bytes,
+        language: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Transcribe audio data, yielding one result per segment."""
+        ...
+
+
 class TranscriberFactory:
     """Factory for creating transcriber instances."""
     
     _instance: Transcriber | None = None
     _mode: TranscriptionMode | None = None
+    _init_lock = asyncio.Lock()  # Prevents loading two models on concurrent create()
     
     @classmethod
     async def create(cls) -> Transcriber:
@@ -42,108 +76,57 @@ class TranscriberFactory:
         - GroqTranscriber
         - OpenAITranscriber
         """
-        mode = settings.get_effective_mode()
+        mode = get_settings().get_effective_mode()
         
         # Return cached instance if mode hasn't changed
         if cls._instance is not None and cls._mode == mode:
             return cls._instance
         
-        print(f"🔧 Creating transcriber with mode: {mode.value}")
-        
-        if mode == TranscriptionMode.GROQ:
-            cls._instance = await cls._create_groq()
-        elif mode == TranscriptionMode.OPENAI:
-            cls._instance = await cls._create_openai()
-        else:
-            cls._instance = await cls._create_local()
-        
-        cls._mode = mode
-        return cls._instance
+        async with cls._init_lock:
+            # Another caller may have created it while we waited
+            if cls._instance is not None and cls._mode == mode:
+                return cls._instance
+            
+            logger.info("🔧 Creating transcriber with mode: %s", mode.value)
+            
+            if mode in CLOUD_PROVIDERS:
+                cls._instance = await cls._create_cloud(mode)
+            else:
+                cls._instance = await cls._create_local()
+            
+            cls._mode = mode
+            return cls._instance
     
     @classmethod
     async def _create_local(cls) -> Transcriber:
         """Create local faster-whisper transcriber."""
         from services.transcriber import TranscriberService
         
+        settings = get_settings()
         transcriber = TranscriberService(
             model_size=settings.whisper_model_size,
             device=settings.whisper_device,
+            compute_type=settings.whisper_compute_type,
+            beam_size=settings.whisper_beam_size,
+            vad_filter=settings.enable_vad,
+            workers=settings.transcribe_workers,
         )
         await transcriber.initialize()
         return transcriber
     
     @classmethod
-    async def _create_groq(cls) -> Transcriber:
-        """Create Groq API transcriber."""
-        if not settings.groq_api_key:
-            print("⚠️ GROQ_API_KEY not set, falling back to local")
-            return await cls._create_local()
-        
-        transcriber = GroqTranscriberWrapper(
-            api_key=settings.groq_api_key,
-            model=settings.groq_model,
-        )
-        await transcriber.initialize()
-        return transcriber
-    
-    @classmethod
-    async def _create_openai(cls) -> Transcriber:
-        """Create OpenAI API transcriber."""
-        if not settings.openai_api_key:
-            print("⚠️ OPENAI_API_KEY not set, falling back to local")
+    async def _create_cloud(cls, mode: TranscriptionMode) -> Transcriber:
+        """Create a cloud API transcriber for the given mode."""
+        settings = get_settings()
+        api_key = getattr(settings, f"{mode.value}_api_key")
+        if not api_key:
+            logger.warning("⚠️ %s_API_KEY not set, falling back to local", mode.value.upper())
             return await cls._create_local()
         
-        transcriber = OpenAITranscriberWrapper(
-            api_key=settings.openai_api_key,
-            model=settings.openai_model,
+        provider_cls = CLOUD_PROVIDERS[mode]
+        transcriber = provider_cls(
+            api_key=api_key,
+            model=getattr(settings, f"{mode.value}_model"),
         )
         await transcriber.initialize()
         return transcriber
-
-
-class GroqTranscriberWrapper:
-    """Wrapper for GroqTranscriber to match Transcriber protocol."""
-    
-    def __init__(self, api_key: str, model: str):
-        self.api_key = api_key
-        self.model = model
-        self._transcriber = None
-        self.is_ready = False
-    
-    async def initialize(self) -> None:
-        from services.cloud_transcriber import GroqTranscriber
-        self._transcriber = GroqTranscriber(api_key=self.api_key, model=self.model)
-        self.is_ready = await self._transcriber.is_available()
-        if self.is_ready:
-            print("✅ Groq transcriber ready")
-        else:
-            print("❌ Groq transcriber not available")
-    
-    async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
-        if not self._transcriber:
-            return {"error": "Not initialized", "text": ""}
-        return await self._transcriber.transcribe(audio_data)
-
-
-class OpenAITranscriberWrapper:
-    """Wrapper for OpenAITranscriber to match Transcriber protocol."""
-    
-    def __init__(self, api_key: str, model: str):
-        self.api_key = api_key
-        self.model = model
-        self._transcriber = None
-        self.is_ready = False
-    
-    async def initialize(self) -> None:
-        from services.cloud_transcriber import OpenAITranscriber
-        self._transcriber = OpenAITranscriber(api_key=self.api_key, model=self.model)
-        self.is_ready = await self._transcriber.is_available()
-        if self.is_ready:
-            print("✅ OpenAI transcriber ready")
-        else:
-            print("❌ OpenAI transcriber not available")
-    
-    async def transcribe(self, audio_data: bytes) -> dict[str, Any]:
-        if not self._transcriber:
-            return {"error": "Not initialized", "text": ""}
-        return await self._transcriber.transcribe(audio_data)
@@ -1,12 +1,101 @@
 """
 Translation Service - Translate subtitles to target language.
 
-Uses free Google Translate API (unofficial).
+Supports:
+- Google Translate API (free, unofficial) - default
+- Local NLLB-200 model via CTranslate2 (offline, int8)
 """
 
-from typing import Any
+from __future__ import annotations
 
-import httpx
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Protocol
+from urllib.parse import quote
+
+from config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("bypass.translator")
+
+# Keep batched GET requests well under common URL length limits.
+# Measured on the percent-encoded query value, not on characters.
+MAX_BATCH_QUERY_LENGTH = 2000
+_ENCODED_NEWLINE = quote("\n")  # Batch separator as it appears in the URL
+
+# Google Translate API endpoint (free, unofficial)
+GOOGLE_TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+
+# Query params shared by every request
+_GOOGLE_BASE_PARAMS = (
+    ("client", "gtx"),
+    ("dt", "t"),  # Return translated text
+)
+
+# Whisper language codes -> NLLB-200 (FLORES-200) codes. Whisper's la, br
+# and haw have no NLLB counterpart.
+NLLB_LANGUAGE_CODES = {
+    "en": "eng_Latn", "zh": "zho_Hans", "de": "deu_Latn", "es": "spa_Latn",
+    "ru": "rus_Cyrl", "ko": "kor_Hang", "fr": "fra_Latn", "ja": "jpn_Jpan",
+    "pt": "por_Latn", "tr": "tur_Latn", "pl": "pol_Latn", "ca": "cat_Latn",
+    "nl": "nld_Latn", "ar": "arb_Arab", "sv": "swe_Latn", "it": "ita_Latn",
+    "id": "ind_Latn", "hi": "hin_Deva", "fi": "fin_Latn", "vi": "vie_Latn",
+    "he": "heb_Hebr", "uk": "ukr_Cyrl", "el": "ell_Grek", "ms": "zsm_Latn",
+    "cs": "ces_Latn", "ro": "ron_Latn", "da": "dan_Latn", "hu": "hun_Latn",
+    "ta": "tam_Taml", "no": "nob_Latn", "th": "tha_Thai", "ur": "urd_Arab",
+    "hr": "hrv_Latn", "bg": "bul_Cyrl", "lt": "lit_Latn", "mi": "mri_Latn",
+    "ml": "mal_Mlym", "cy": "cym_Latn", "sk": "slk_Latn", "te": "tel_Telu",
+    "fa": "pes_Arab", "lv": "lvs_Latn", "bn": "ben_Beng", "sr": "srp_Cyrl",
+    "az": "azj_Latn", "sl": "slv_Latn", "kn": "kan_Knda", "et": "est_Latn",
+    "mk": "mkd_Cyrl", "eu": "eus_Latn", "is": "isl_Latn", "hy": "hye_Armn",
+    "ne": "npi_Deva", "mn": "khk_Cyrl", "bs": "bos_Latn", "kk": "kaz_Cyrl",
+    "sq": "als_Latn", "sw": "swh_Latn", "gl": "glg_Latn", "mr": "mar_Deva",
+    "pa": "pan_Guru", "si": "sin_Sinh", "km": "khm_Khmr", "sn": "sna_Latn",
+    "yo": "yor_Latn", "so": "som_Latn", "af": "afr_Latn", "oc": "oci_Latn",
+    "ka": "kat_Geor", "be": "bel_Cyrl", "tg": "tgk_Cyrl", "sd": "snd_Arab",
+    "gu": "guj_Gujr", "am": "amh_Ethi", "yi": "ydd_Hebr", "lo": "lao_Laoo",
+    "uz": "uzn_Latn", "fo": "fao_Latn", "ht": "hat_Latn", "ps": "pbt_Arab",
+    "tk": "tuk_Latn", "nn": "nno_Latn", "mt": "mlt_Latn", "sa": "san_Deva",
+    "lb": "ltz_Latn", "my": "mya_Mymr", "bo": "bod_Tibt", "tl": "tgl_Latn",
+    "mg": "plt_Latn", "as": "asm_Beng", "tt": "tat_Cyrl", "ln": "lin_Latn",
+    "ha": "hau_Latn", "ba": "bak_Cyrl", "jw": "jav_Latn", "su": "sun_Latn",
+    "yue": "yue_Hant",
+}
+
+
+class Translator(Protocol):
+    """Protocol for translator implementations."""
+    
+    async def initialize(self) -> None:
+        """Load anything needed before the first translation."""
+        ...
+    
+    async def translate(
+        self,
+        text: str,
+        target_lang: str,
+        source_lang: str = "auto",
+    ) -> dict[str, Any]:
+        """Translate text to target language."""
+        ...
+    
+    async def translate_batch(
+        self,
+        texts: list[str],
+        target_lang: str,
+        source_lang: str = "auto",
+    ) -> list[str]:
+        """Translate several texts, aligned with the input list."""
+        ...
+    
+    async def close(self) -> None:
+        """Release resources."""
+        ...
 
 
 class TranslationService:
@@ -14,15 +103,33 @@ class TranslationService:
     Service for translating text between languages.
     
     Uses free Google Translate API by default.
+    Successful translations are kept in a small LRU cache so repeated
+    segments don't pay another HTTP round-trip.
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 512):
         self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[tuple[str, str, str], dict[str, Any]] = OrderedDict()
+        self._cache_size = cache_size
+    
+    async def initialize(self) -> None:
+        """Nothing to preload; the HTTP client is created on first use."""
     
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=10.0)
+            import httpx
+            
+            # Long-lived HTTP/2 connections keep the TLS session warm between calls
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=10.0,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=50,
+                    keepalive_expiry=300,
+                ),
+            )
         return self._client
     
     async def translate(
@@ -42,17 +149,23 @@ class TranslationService:
         Returns:
             Dictionary with 'translated', 'original', 'detected_lang'
         """
-        if not text or not text.strip():
+        if not text.strip():
             return {"translated": "", "original": "", "detected_lang": ""}
         
         if not target_lang:
             return {"translated": text, "original": text, "detected_lang": source_lang}
         
+        key = (text, target_lang, source_lang)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return dict(cached)
+        
         try:
             result = await self._translate_google(text, target_lang, source_lang)
-            return result
+            self._cache_put(key, result)
+            return dict(result)
         except Exception as e:
-            print(f"❌ Translation error: {e}")
+            logger.error("❌ Translation error: %s", e)
             return {
                 "translated": text,
                 "original": text,
@@ -60,6 +173,109 @@ class TranslationService:
                 "error": str(e),
             }
     
+    async def translate_batch(
+        self,
+        texts: list[str],
+        target_lang: str,
+        source_lang: str = "auto",
+    ) -> list[str]:
+        """
+        Translate several texts using as few requests as possible.
+        
+        Uncached texts are joined with newlines into requests whose
+        percent-encoded query stays within MAX_BATCH_QUERY_LENGTH. Google
+        Translate keeps line breaks, so each response splits back into one
+        line per input.
+        
+        Args:
+            texts: Texts to translate (e.g. segment texts)
+            target_lang: Target language code (e.g., 'vi', 'en', 'zh')
+            source_lang: Source language code or 'auto' for detection
+            
+        Returns:
+            Translated texts, aligned with the input list
+        """
+        if not target_lang:
+            return list(texts)
+        
+        translated: list[str] = [""] * len(texts)
+        pending: list[tuple[int, str]] = []
+        
+        for i, text in enumerate(texts):
+            # Newlines are the batch separator, so they can't appear inside a text
+            text = " ".join(text.split())
+            if not text:
+                continue
+            cached = self._cache_get((text, target_lang, source_lang))
+            if cached is not None:
+                translated[i] = cached["translated"]
+            else:
+                pending.append((i, text))
+        
+        for batch in self._split_batches(pending):
+            joined = "\n".join(text for _, text in batch)
+            try:
+                result = await self._translate_google(joined, target_lang, source_lang)
+            except Exception as e:
+                logger.error("❌ Translation error: %s", e)
+                for i, text in batch:
+                    translated[i] = text
+                continue
+            
+            lines = result["translated"].split("\n")
+            if len(lines) != len(batch):
+                # Line structure not preserved, translate one by one
+                for i, text in batch:
+                    single = await self.translate(text, target_lang, source_lang)
+                    translated[i] = single["translated"]
+                continue
+            
+            for (i, text), line in zip(batch, lines):
+                translated[i] = line.strip()
+                self._cache_put((text, target_lang, source_lang), {
+                    "translated": translated[i],
+                    "original": text,
+                    "detected_lang": result["detected_lang"],
+                })
+        
+        return translated
+    
+    @staticmethod
+    def _split_batches(
+        items: list[tuple[int, str]],
+    ) -> list[list[tuple[int, str]]]:
+        """Group items so each encoded batch stays within MAX_BATCH_QUERY_LENGTH."""
+        batches: list[list[tuple[int, str]]] = []
+        current: list[tuple[int, str]] = []
+        size = 0
+        
+        for item in items:
+            # Non-ASCII text (zh/ja/ko/vi/th) expands up to 9x when encoded
+            length = len(quote(item[1], safe="")) + len(_ENCODED_NEWLINE)
+            if current and size + length > MAX_BATCH_QUERY_LENGTH:
+                batches.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += length
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _cache_get(self, key: tuple[str, str, str]) -> dict[str, Any] | None:
+        """Look up a cached translation and mark it as recently used."""
+        # Cache lookups/updates never await, so they are atomic on the event loop
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        return cached
+    
+    def _cache_put(self, key: tuple[str, str, str], result: dict[str, Any]) -> None:
+        """Store a translation, evicting the least recently used entry."""
+        self._cache[key] = result
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+    
     async def _translate_google(
         self,
         text: str,
@@ -71,18 +287,14 @@ class TranslationService:
         """
         client = await self._get_client()
         
-        # Google Translate API endpoint
-        url = "https://translate.googleapis.com/translate_a/single"
-        
-        params = {
-            "client": "gtx",
-            "sl": source_lang,  # Source language
-            "tl": target_lang,  # Target language
-            "dt": "t",  # Return translated text
-            "q": text,
-        }
+        params = (
+            *_GOOGLE_BASE_PARAMS,
+            ("sl", source_lang),  # Source language
+            ("tl", target_lang),  # Target language
+            ("q", text),
+        )
         
-        response = await client.get(url, params=params)
+        response = await client.get(GOOGLE_TRANSLATE_URL, params=params)
         response.raise_for_status()
         
         # Parse response
@@ -115,13 +327,198 @@ class TranslationService:
             self._client = None
 
 
+class LocalTranslator:
+    """
+    Offline translation using an int8 NLLB-200 model via CTranslate2.
+    
+    Removes the network round-trip entirely and translates all segments
+    of a chunk in one batched forward pass. The model is loaded by
+    initialize() at startup; requires the optional 'nllb' dependencies
+    and a model converted with ct2-transformers-converter.
+    """
+    
+    def __init__(self, model_path: str, tokenizer_name: str):
+        self.model_path = model_path
+        self.tokenizer_name = tokenizer_name
+        self._translator = None
+        self._tokenizer = None
+        self._tokenizer_lock = threading.Lock()  # src_lang is tokenizer state
+        self._unsupported_pairs: set[tuple[str, str]] = set()  # Already warned about
+    
+    async def initialize(self) -> None:
+        """
+        Load model and tokenizer (blocking work runs in a thread).
+        
+        Errors propagate so a bad model path or missing extra fails at
+        startup instead of on every subtitle.
+        """
+        await asyncio.to_thread(self._load)
+    
+    def _load(self) -> None:
+        """Load the CTranslate2 model and tokenizer (blocking)."""
+        import ctranslate2
+        from transformers import AutoTokenizer
+        
+        logger.info("📦 Loading NLLB translator: %s", self.model_path)
+        inter_threads = 2
+        self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        self._translator = ctranslate2.Translator(
+            self.model_path,
+            device="cpu",
+            compute_type="int8",
+            inter_threads=inter_threads,
+            intra_threads=max(1, (os.cpu_count() or 1) // inter_threads),
+        )
+        logger.info("✅ NLLB translator ready")
+    
+    async def translate(
+        self,
+        text: str,
+        target_lang: str,
+        source_lang: str = "auto",
+    ) -> dict[str, Any]:
+        """
+        Translate text to target language.
+        
+        Args:
+            text: Text to translate
+            target_lang: Target language code (e.g., 'vi', 'en', 'zh')
+            source_lang: Source language code; NLLB cannot auto-detect
+            
+        Returns:
+            Dictionary with 'translated', 'original', 'detected_lang'
+        """
+        if not text.strip():
+            return {"translated": "", "original": "", "detected_lang": ""}
+        
+        if not target_lang:
+            return {"translated": text, "original": text, "detected_lang": source_lang}
+        
+        try:
+            translated = await self._translate_texts([text], target_lang, source_lang)
+            return {
+                "translated": translated[0],
+                "original": text,
+                "detected_lang": source_lang,
+            }
+        except Exception as e:
+            logger.error("❌ Translation error: %s", e)
+            return {
+                "translated": text,
+                "original": text,
+                "detected_lang": source_lang,
+                "error": str(e),
+            }
+    
+    async def translate_batch(
+        self,
+        texts: list[str],
+        target_lang: str,
+        source_lang: str = "auto",
+    ) -> list[str]:
+        """
+        Translate several texts in a single batched forward pass.
+        
+        Returns:
+            Translated texts, aligned with the input list
+        """
+        if not target_lang:
+            return list(texts)
+        
+        try:
+            return await self._translate_texts(texts, target_lang, source_lang)
+        except Exception as e:
+            logger.error("❌ Translation error: %s", e)
+            return list(texts)
+    
+    async def _translate_texts(
+        self,
+        texts: list[str],
+        target_lang: str,
+        source_lang: str,
+    ) -> list[str]:
+        """
+        Map language codes and run batch translation in a thread.
+        
+        Pairs NLLB cannot translate are returned unchanged, with one
+        warning per pair.
+        """
+        src_code = NLLB_LANGUAGE_CODES.get(source_lang)
+        tgt_code = NLLB_LANGUAGE_CODES.get(target_lang)
+        if src_code is None or tgt_code is None:
+            if (source_lang, target_lang) not in self._unsupported_pairs:
+                self._unsupported_pairs.add((source_lang, target_lang))
+                logger.warning(
+                    "⚠️ NLLB cannot translate %s -> %s, leaving text untranslated",
+                    source_lang,
+                    target_lang,
+                )
+            return list(texts)
+        
+        # Empty texts would still decode to something, so leave them out
+        indices = [i for i, text in enumerate(texts) if text.strip()]
+        translated = [""] * len(texts)
+        if not indices:
+            return translated
+        
+        if self._translator is None:
+            raise RuntimeError("NLLB translator not initialized")
+        results = await asyncio.to_thread(
+            self._translate_sync,
+            [texts[i] for i in indices],
+            src_code,
+            tgt_code,
+        )
+        for i, text in zip(indices, results):
+            translated[i] = text
+        return translated
+    
+    def _translate_sync(self, texts: list[str], src_code: str, tgt_code: str) -> list[str]:
+        """Tokenize, translate and detokenize a batch (blocking)."""
+        with self._tokenizer_lock:
+            self._tokenizer.src_lang = src_code
+            sources = [
+                self._tokenizer.convert_ids_to_tokens(self._tokenizer.encode(text))
+                for text in texts
+            ]
+        
+        results = self._translator.translate_batch(
+            sources,
+            target_prefix=[[tgt_code]] * len(sources),
+            beam_size=1,
+        )
+        
+        translated = []
+        for result in results:
+            tokens = result.hypotheses[0][1:]  # Drop the target language token
+            translated.append(
+                self._tokenizer.decode(
+                    self._tokenizer.convert_tokens_to_ids(tokens),
+                    skip_special_tokens=True,
+                ).strip()
+            )
+        return translated
+    
+    async def close(self) -> None:
+        """Release the model."""
+        self._translator = None
+        self._tokenizer = None
+
+
 # Singleton instance
-_translator: TranslationService | None = None
+_translator: Translator | None = None
 
 
-def get_translator() -> TranslationService:
-    """Get translator singleton instance."""
+def get_translator() -> Translator:
+    """Get translator singleton instance for the configured backend."""
     global _translator
     if _translator is None:
-        _translator = TranslationService()
+        settings = get_settings()
+        if settings.translator_backend == "nllb_ct2":
+            _translator = LocalTranslator(
+                model_path=settings.nllb_model_path,
+                tokenizer_name=settings.nllb_tokenizer,
+            )
+        else:
+            _translator = TranslationService()
     return _translator
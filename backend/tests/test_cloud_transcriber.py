@@ -0,0 +1,18 @@
+"""Tests for cloud transcriber helpers."""
+
+from services.cloud_transcriber import _language_code
+
+
+def test_language_name_maps_to_code():
+    assert _language_code("english") == "en"
+    assert _language_code("Vietnamese") == "vi"
+    assert _language_code("haitian creole") == "ht"
+
+
+def test_language_code_passes_through():
+    assert _language_code("en") == "en"
+
+
+def test_missing_language_is_unknown():
+    assert _language_code(None) == "unknown"
+    assert _language_code("") == "unknown"
@@ -0,0 +1,120 @@
+"""Tests for TranslationService batching and caching, and LocalTranslator."""
+
+from urllib.parse import quote
+
+import logging
+
+import pytest
+
+from services.translator import (
+    MAX_BATCH_QUERY_LENGTH,
+    LocalTranslator,
+    TranslationService,
+)
+
+
+@pytest.fixture
+def service():
+    """TranslationService with _translate_google stubbed to upper-case text."""
+    translator = TranslationService()
+    translator.calls = []
+    
+    async def fake_google(text, target_lang, source_lang):
+        translator.calls.append(text)
+        return {"translated": text.upper(), "original": text, "detected_lang": "en"}
+    
+    translator._translate_google = fake_google
+    return translator
+
+
+async def test_batch_uses_one_request(service):
+    result = await service.translate_batch(["hello", "world"], "vi", "en")
+    
+    assert result == ["HELLO", "WORLD"]
+    assert service.calls == ["hello\nworld"]
+
+
+async def test_batch_hits_cache(service):
+    await service.translate_batch(["hello", "world"], "vi", "en")
+    service.calls.clear()
+    
+    result = await service.translate_batch(["world", "hello"], "vi", "en")
+    
+    assert result == ["WORLD", "HELLO"]
+    assert service.calls == []
+
+
+async def test_translate_shares_cache_with_batch(service):
+    await service.translate_batch(["hello", "world"], "vi", "en")
+    service.calls.clear()
+    
+    result = await service.translate("hello", "vi", "en")
+    
+    assert result["translated"] == "HELLO"
+    assert service.calls == []
+
+
+async def test_line_count_mismatch_falls_back_to_single(service):
+    async def merging_google(text, target_lang, source_lang):
+        service.calls.append(text)
+        # Simulate the API merging lines in a batched request
+        return {
+            "translated": text.replace("\n", " ").upper(),
+            "original": text,
+            "detected_lang": "en",
+        }
+    
+    service._translate_google = merging_google
+    
+    result = await service.translate_batch(["hello", "world"], "vi", "en")
+    
+    assert result == ["HELLO", "WORLD"]
+    assert service.calls == ["hello\nworld", "hello", "world"]
+
+
+async def test_empty_inputs(service):
+    result = await service.translate_batch(["", "  ", "hi"], "vi", "en")
+    
+    assert result == ["", "", "HI"]
+    assert service.calls == ["hi"]
+
+
+async def test_no_target_returns_input(service):
+    result = await service.translate_batch(["hello"], "", "en")
+    
+    assert result == ["hello"]
+    assert service.calls == []
+
+
+async def test_batches_split_on_encoded_length(service):
+    # Each CJK character encodes to 9 URL characters
+    text = "字" * 100
+    assert len(quote(text)) == 900
+    
+    texts = [f"{text}{i}" for i in range(5)]
+    result = await service.translate_batch(texts, "vi", "zh")
+    
+    assert result == [t.upper() for t in texts]
+    assert len(service.calls) == 3
+    for call in service.calls:
+        assert len(quote(call, safe="")) <= MAX_BATCH_QUERY_LENGTH
+
+
+def test_split_batches_keeps_oversized_item_alone():
+    items = [(0, "a" * (MAX_BATCH_QUERY_LENGTH + 10)), (1, "b")]
+    
+    batches = TranslationService._split_batches(items)
+    
+    assert batches == [[items[0]], [items[1]]]
+
+
+async def test_nllb_unsupported_pair_warns_once(caplog):
+    translator = LocalTranslator("model", "tokenizer")
+    
+    with caplog.at_level(logging.WARNING, logger="bypass.translator"):
+        first = await translator.translate_batch(["salve", "mundi"], "vi", "la")
+        second = await translator.translate("salve", "vi", "la")
+    
+    assert first == ["salve", "mundi"]
+    assert second["translated"] == "salve"
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
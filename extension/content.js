@@ -24,6 +24,10 @@ let audioChunks = [];
 let subtitleOverlay = null;
 let sendInterval = null;
 
+// Partial subtitles of the chunk currently being streamed
+let streamingChunk = null;
+let streamingParts = [];
+
 // Language settings
 let currentSettings = {
     sourceLang: 'auto',
@@ -103,6 +107,7 @@ function handleMessage(message, sender, sendResponse) {
             if (message.settings) {
                 currentSettings = message.settings;
                 console.log('⚙️ Settings updated:', currentSettings);
+                sendSettings();
             }
             sendResponse({ success: true });
             break;
@@ -340,6 +345,8 @@ function setupVideoEventListeners() {
     activeVideo.addEventListener('seeking', () => {
         console.log('⏩ Video seeking - clearing audio buffer');
         audioChunks = [];
+        streamingChunk = null;
+        streamingParts = [];
         if (subtitleOverlay) {
             subtitleOverlay.innerHTML = '';
         }
@@ -397,6 +404,7 @@ async function connectWebSocket() {
 
         websocket.onopen = () => {
             console.log('✅ Connected to backend');
+            sendSettings();
             resolve();
         };
 
@@ -505,7 +513,7 @@ async function startAudioCapture() {
 }
 
 /**
- * Send accumulated audio chunks to backend with settings and video timestamp
+ * Send accumulated audio chunks to backend as a binary PCM frame
  */
 function sendAudioChunks() {
     if (audioChunks.length === 0) return;
@@ -527,20 +535,23 @@ function sendAudioChunks() {
     // Clear chunks
     audioChunks = [];
 
-    // Convert to base64 for JSON transmission
-    const base64Audio = arrayBufferToBase64(mergedData.buffer);
+    // Send raw PCM as a binary frame (settings are sent separately)
+    websocket.send(mergedData.buffer);
+    console.log(`📤 Sent ${totalLength} samples @ ${formatTime(videoTime)}`);
+}
+
+/**
+ * Send current language settings to backend
+ * Applies to all following audio frames on this connection
+ */
+function sendSettings() {
+    if (websocket?.readyState !== WebSocket.OPEN) return;
 
-    // Send JSON message with audio, settings, and video timestamp
-    const message = {
-        audio: base64Audio,
+    websocket.send(JSON.stringify({
         sourceLang: currentSettings.sourceLang,
         targetLang: currentSettings.targetLang,
         showOriginal: currentSettings.showOriginal,
-        videoTime: videoTime, // Current position in video (seconds)
-    };
-
-    websocket.send(JSON.stringify(message));
-    console.log(`📤 Sent ${totalLength} samples @ ${formatTime(videoTime)}`);
+    }));
 }
 
 /**
@@ -552,18 +563,6 @@ function formatTime(seconds) {
     return `${mins}:${secs.toString().padStart(2, '0')}`;
 }
 
-/**
- * Convert ArrayBuffer to base64 string
- */
-function arrayBufferToBase64(buffer) {
-    const bytes = new Uint8Array(buffer);
-    let binary = '';
-    for (let i = 0; i < bytes.length; i++) {
-        binary += String.fromCharCode(bytes[i]);
-    }
-    return btoa(binary);
-}
-
 /**
  * Stop audio capture
  */
@@ -596,10 +595,25 @@ function handleTranscription(data) {
         return;
     }
 
-    const original = data.original || data.text || '';
-    const translated = data.translated || '';
+    let original = data.original || data.text || '';
+    let translated = data.translated || '';
     const showOriginal = data.showOriginal !== false && currentSettings.showOriginal;
 
+    if (data.final === false) {
+        // Partial segment: append to the other segments of the same chunk
+        if (data.chunk !== streamingChunk) {
+            streamingChunk = data.chunk;
+            streamingParts = [];
+        }
+        streamingParts.push({ original, translated });
+        original = streamingParts.map((part) => part.original).join(' ');
+        translated = streamingParts.map((part) => part.translated).filter(Boolean).join(' ');
+    } else if (data.chunk !== undefined && data.chunk === streamingChunk) {
+        // Final frame carries the whole chunk and replaces its partials
+        streamingChunk = null;
+        streamingParts = [];
+    }
+
     if (original.trim() || translated.trim()) {
         console.log(`📝 Original: ${original}`);
         if (translated) {